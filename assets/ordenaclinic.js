@@ -0,0 +1,130 @@
+// assets/ordenaclinic.js
+// ------------------------------------------------------------
+// Callbacks executados no navegador (clientside) do OrdenaClinic.
+// O Dash serve automaticamente os arquivos da pasta assets/.
+// ------------------------------------------------------------
+
+// Inteiro (com sinal, para a checagem de faixa dar a mensagem certa); frações e texto não passam
+const INTEIRO = /^-?\d+$/;
+
+// Condições da tabela REGRAS_PRIORIDADE (Python), pelo nome usado lá
+const CONDICOES_REGRA = {
+    idade_min: function (anos, meses, flags, valor) { return anos >= valor; },
+    marcado: function (anos, meses, flags, valor) { return flags.indexOf(valor) !== -1; },
+    meses_acima: function (anos, meses, flags, valor) { return anos * 12 + meses > valor; },
+};
+
+// Grupos desabilitados nas opções exibidas hoje no checklist (o layout começa sem nenhum)
+let bloqueiosExibidos = "";
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    ordenaclinic: {
+        // Monta as linhas (data) do DataTable a partir do store (lista de pacientes).
+        // Os rótulos vêm do store-config (definidos no Python); as cores já estão fixas na tabela.
+        render: function (store, config) {
+            const lista = (store && store.lista) || [];
+            const registros = lista.map(function (p, i) {
+                // rótulo de prioridade legal: concatena os grupos presentes (idoso é derivado da idade)
+                const grupos = config.prioridade_labels
+                    .filter(function (par) { return p[par[0]]; })
+                    .map(function (par) { return par[1]; });
+                if (p.idade >= 60) {
+                    grupos.push("Idoso (60+)");
+                }
+                // idade como "X anos Y meses"
+                const anos = p.idade;
+                const meses = p.meses || 0;
+                let idade;
+                if (anos <= 0 && meses > 0) {
+                    idade = meses + " meses";
+                } else if (meses <= 0) {
+                    idade = anos + " anos";
+                } else {
+                    idade = anos + " anos " + meses + " meses";
+                }
+                return {
+                    "posição": i + 1,
+                    "nome": p.nome,
+                    "prioridade": grupos.join(", "),
+                    "triagem": p.triagem,
+                    "triagem_label": config.triagem_labels[p.triagem],
+                    "chegada": p.chegada,
+                    "idade_label": idade,
+                };
+            });
+            return registros;
+        },
+
+        // Desabilita e desmarca opções de prioridade inválidas conforme idade em anos/meses e
+        // seleção atual. Devolve [options, value] do checklist in-prioridades; o que não mudou
+        // volta como no_update, e o Dash não re-renderiza o checklist a cada tecla.
+        // As regras vêm de config.regras_prioridade, a mesma tabela que o cadastro aplica no servidor.
+        ajustarPrioridades: function (idadeAnos, idadeMeses, valoresAtuais, config) {
+            // lista de opções pronta (OPCOES_PRIORIDADE no Python): não é remontada a cada tecla
+            const base = config.opcoes_prioridade;
+            const noUpdate = window.dash_clientside.no_update;
+            const atuais = valoresAtuais || [];
+            const anos = idadeAnos === null || idadeAnos === undefined ? null : Math.trunc(Number(idadeAnos));
+            const meses = idadeMeses === null || idadeMeses === undefined ? 0 : Math.trunc(Number(idadeMeses));
+            const bloqueadas = new Set();
+            if (anos !== null && !Number.isNaN(anos) && !Number.isNaN(meses)) {
+                config.regras_prioridade.forEach(function (regra) {
+                    if (CONDICOES_REGRA[regra[0]](anos, meses, atuais, regra[1])) {
+                        regra[2].forEach(function (g) { bloqueadas.add(g); });
+                    }
+                });
+            }
+
+            // as opções só são reenviadas quando o conjunto de bloqueios muda (cruzou 60 anos/36 meses)
+            const bloqueios = base
+                .filter(function (o) { return bloqueadas.has(o.value); })
+                .map(function (o) { return o.value; })
+                .join(",");
+            let opcoes = noUpdate;
+            if (bloqueios !== bloqueiosExibidos) {
+                bloqueiosExibidos = bloqueios;
+                // só as opções desabilitadas ganham um objeto novo; as demais são as da base
+                opcoes = bloqueadas.size === 0 ? base : base.map(function (o) {
+                    return bloqueadas.has(o.value) ? Object.assign({}, o, {"disabled": true}) : o;
+                });
+            }
+            const valores = atuais.filter(function (v) { return !bloqueadas.has(v); });
+            // o filtro só remove itens: mesmo tamanho significa seleção inalterada
+            return [opcoes, valores.length === atuais.length ? noUpdate : valores];
+        },
+
+        // Esvazia nome e idade depois de um cadastro aceito; devolve [nome, anos, meses].
+        limparForm: function () {
+            return ["", null, null];
+        },
+
+        // Habilita o botão de adicionar só com o formulário válido; devolve [disabled, mensagem].
+        validarForm: function (nome, anos, meses, config) {
+            // nome obrigatório
+            if (!nome || !String(nome).trim()) {
+                return [true, "Informe o nome do paciente"];
+            }
+            // anos: inteiro entre 0 e config.idade_max_anos (limites do store-config, os mesmos do cadastro)
+            const anosTxt = anos === null || anos === undefined ? "" : String(anos).trim();
+            if (!anosTxt) {
+                return [true, "Informe a idade (anos)"];
+            }
+            if (!INTEIRO.test(anosTxt) || Number(anosTxt) < 0 || Number(anosTxt) > config.idade_max_anos) {
+                return [true, "Idade inválida"];
+            }
+            // meses: inteiro entre 0 e config.meses_max (vazio conta como 0)
+            const mesesTxt = meses === null || meses === undefined ? "" : String(meses).trim();
+            let mesesInt = 0;
+            if (mesesTxt) {
+                if (!INTEIRO.test(mesesTxt)) {
+                    return [true, "Meses inválidos"];
+                }
+                mesesInt = Number(mesesTxt);
+            }
+            if (mesesInt < 0 || mesesInt > config.meses_max) {
+                return [true, "Meses deve estar entre 0 e " + config.meses_max];
+            }
+            return [false, ""];
+        },
+    },
+});
@@ -1,22 +1,23 @@
 # ordenaclinic_app.py
 # ------------------------------------------------------------
-# OrdenaClinic · Fila de triagem com Merge Sort (estável)
+# OrdenaClinic · Fila de triagem com ordenação estável (Timsort / Merge Sort)
 # Interface em Dash (100% local)
 # ------------------------------------------------------------
 
+import bisect
+import threading
 import time
-from dataclasses import dataclass, asdict
-from typing import List, Tuple, Callable
-from datetime import datetime
+from dataclasses import dataclass, field
+from typing import List, Tuple
 
-import pandas as pd
-from dash import Dash, dcc, html, Input, Output, State, no_update, dash_table
+import numpy as np
+from dash import Dash, dcc, html, Input, Output, State, ClientsideFunction, Patch, no_update, dash_table
 
 # ============================
 # Modelo e utilidades
 # ============================
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Paciente:
     id: int
     nome: str
@@ -30,6 +31,33 @@ class Paciente:
     lactante: bool = False
     crianca_colo: bool = False
     obesidade: bool = False
+    # 0 para prioritário (vem antes), 1 para não prioritário; calculado uma vez, na criação
+    prioridade_flag: int = field(init=False, default=1)
+
+    def __post_init__(self):
+        # grupo prioritário pela legislação: algum grupo marcado ou idoso (60+)
+        possui_prioridade = (
+            self.deficiencia or self.gestante or self.lactante or self.crianca_colo or self.obesidade
+            or self.idade >= 60
+        )
+        object.__setattr__(self, "prioridade_flag", 0 if possui_prioridade else 1)
+
+def paciente_para_dict(p: Paciente) -> dict:
+    """Serializa um Paciente para o formato do store (cópia rasa, sem o deepcopy de asdict)."""
+    return {
+        "id": p.id,
+        "nome": p.nome,
+        "chegada": p.chegada,
+        "idade": p.idade,
+        "triagem": p.triagem,
+        "meses": p.meses,
+        "deficiencia": p.deficiencia,
+        "gestante": p.gestante,
+        "lactante": p.lactante,
+        "crianca_colo": p.crianca_colo,
+        "obesidade": p.obesidade,
+        "prioridade_flag": p.prioridade_flag,
+    }
 
 TRIAGEM_LABELS = {
     0: "Vermelho (crítico)",
@@ -45,10 +73,64 @@ TRIAGEM_CORES = {
     3: "#1976d2",
     4: "#757575",
 }
+# Grupos de prioridade legal marcados no cadastro (idoso é derivado da idade)
+PRIORIDADE_LABELS = {
+    "deficiencia": "Deficiência",
+    "gestante": "Gestante",
+    "lactante": "Lactante",
+    "crianca_colo": "Criança de colo",
+    "obesidade": "Obesidade",
+}
+# Opções do checklist de prioridade legal, montadas uma vez (reusadas pelo layout e pelo navegador)
+OPCOES_PRIORIDADE = [{"label": rotulo, "value": campo} for campo, rotulo in PRIORIDADE_LABELS.items()]
+# Regras de consistência do cadastro, numa tabela só: (condição, parâmetro, grupos removidos).
+# É usada pelo cadastro (aplicar_regras_prioridade) e pelo checklist no navegador (via store-config),
+# então uma regra nova entra aqui e vale nos dois lugares.
+REGRAS_PRIORIDADE = (
+    ("idade_min", 60, ("gestante", "lactante")),             # idoso (60+) não pode ser gestante/lactante
+    ("marcado", "crianca_colo", ("gestante", "lactante")),   # criança de colo não é gestante/lactante
+    ("meses_acima", 36, ("crianca_colo",)),                  # criança de colo só até 3 anos (36 meses)
+)
+_CONDICOES_REGRA = {
+    "idade_min": lambda anos, meses, flags, valor: anos >= valor,
+    "marcado": lambda anos, meses, flags, valor: valor in flags,
+    "meses_acima": lambda anos, meses, flags, valor: anos * 12 + meses > valor,
+}
+
+def aplicar_regras_prioridade(anos: int, meses: int, flags: frozenset) -> frozenset:
+    """Remove dos grupos marcados os que alguma regra de REGRAS_PRIORIDADE invalida (avaliadas sobre a seleção original)."""
+    removidos = set()
+    for condicao, valor, grupos in REGRAS_PRIORIDADE:
+        if _CONDICOES_REGRA[condicao](anos, meses, flags, valor):
+            removidos.update(grupos)
+    return flags - removidos if removidos else flags
+
+# Faixas aceitas no cadastro (as mesmas do formulário); também garantem que idade e meses
+# cabem nos dtypes de COLUNAS_DTYPE
+IDADE_MAX_ANOS = 120
+MESES_MAX = 11
+
+# Campos do store com o dtype numpy de cada um (usado pelas ordenações vetorizadas).
+# Tipos estreitos conforme a faixa de cada campo: menos memória e chaves mais baratas no lexsort
+COLUNAS_DTYPE = {
+    "chegada": np.int32,
+    "idade": np.int16,
+    "meses": np.int8,
+    "triagem": np.int8,
+    "prioridade_flag": np.int8,
+}
 
-def chave_padrao(p: Paciente) -> Tuple[int, int, int, int]:
+def pacientes_para_colunas(pacientes: List[dict]) -> dict:
+    """Transpõe a fila (lista de registros) para arrays numpy tipados, uma coluna por campo."""
+    n = len(pacientes)
+    return {
+        campo: np.fromiter((p[campo] for p in pacientes), dtype=dtype, count=n)
+        for campo, dtype in COLUNAS_DTYPE.items()
+    }
+
+def chave_padrao(p: dict) -> Tuple[int, int, int, int]:
     """
-    Chave de ordenação padrão (usada pelo Merge Sort).
+    Chave de ordenação padrão, aplicada aos registros de paciente (dicts) guardados no store.
 
     Ordem (importante):
       1) triagem (ASC) - prioridades clínicas (0=Vermelho, 1=Amarelo) sempre vêm primeiro
@@ -58,57 +140,81 @@ def chave_padrao(p: Paciente) -> Tuple[int, int, int, int]:
 
     Observação: a prioridade legal não sobrescreve casos de emergência/urgência porque triagem tem precedência.
     """
-    # determina se o paciente pertence a grupo prioritário pela legislação
-    total_months = (p.idade * 12) + int(getattr(p, "meses", 0))
-    possui_prioridade = (
-        p.deficiencia or p.gestante or p.lactante or p.crianca_colo or p.obesidade or (p.idade >= 60)
-    )
-    # prioridade_flag: 0 para prioritário (vem antes), 1 para não prioritário
-    prioridade_flag = 0 if possui_prioridade else 1
+    # prioridade_flag (0 = grupo prioritário) vem pronto do cadastro, ver Paciente.__post_init__
+    total_months = (p["idade"] * 12) + p["meses"]
 
     # Em qualquer caso, triagem continua sendo o primeiro critério. A prioridade legal só afeta
     # a ordenação entre pacientes com a mesma triagem (em especial, triagens não urgentes).
     # desempate por idade mais preciso: usar total de meses (maiores primeiro)
-    return (p.triagem, prioridade_flag, p.chegada, -total_months)
+    return (p["triagem"], p["prioridade_flag"], p["chegada"], -total_months)
 
 # ============================
 # Merge Sort estável com métricas
 # ============================
 
 class Medidor:
-    def __init__(self, key: Callable[[Paciente], tuple]):
-        self.keyf = key
+    """Conta comparações entre pacientes já decorados com a chave (chave, paciente)."""
+    def __init__(self):
         self.comparacoes = 0
 
-    def cmp_le(self, a: Paciente, b: Paciente) -> bool:
+    def cmp_le(self, a: Tuple[tuple, dict], b: Tuple[tuple, dict]) -> bool:
         self.comparacoes += 1
-        return self.keyf(a) <= self.keyf(b)
-
-def merge_sort_estavel(arr: List[Paciente], key=chave_padrao):
+        return a[0] <= b[0]
+
+# Buffer auxiliar do merge reaproveitado entre ordenações: um só no módulo, protegido por lock
+# (o servidor atende cada conexão numa thread nova, então um buffer por thread quase nunca seria
+# reusado). Só cresce; o conteúdo antigo é sobrescrito no próximo uso e guarda no máximo as
+# referências da última fila ordenada. Com o gerenciador em segundo plano (diskcache) cada
+# ordenação roda num processo novo e o buffer nasce vazio: o reaproveitamento vale sem ele.
+_buffer_merge: list = []
+_buffer_merge_lock = threading.Lock()
+
+def _buffer_auxiliar(n: int) -> list:
+    """Devolve o buffer compartilhado com ao menos n posições; chamar com _buffer_merge_lock."""
+    if len(_buffer_merge) < n:
+        _buffer_merge.extend([None] * (n - len(_buffer_merge)))
+    return _buffer_merge
+
+def merge_sort_estavel(arr: List[dict], key=chave_padrao):
     inicio = time.perf_counter()
-    med = Medidor(key)
-
-    def merge_sort(lst: List[Paciente]) -> List[Paciente]:
-        if len(lst) <= 1:
-            return lst
-        mid = len(lst) // 2
-        left = merge_sort(lst[:mid])
-        right = merge_sort(lst[mid:])
-        return merge(left, right)
-
-    def merge(left: List[Paciente], right: List[Paciente]) -> List[Paciente]:
-        i = j = 0
-        res: List[Paciente] = []
-        while i < len(left) and j < len(right):
-            if med.cmp_le(left[i], right[j]):
-                res.append(left[i]); i += 1
+    med = Medidor()
+    # decorate-sort-undecorate: a chave é calculada uma vez por paciente (N vezes),
+    # e não duas vezes por comparação (~2·N·log2 N vezes)
+    decorados = [(key(p), p) for p in arr]
+
+    def merge(src: list, dst: list, ini: int, meio: int, fim: int) -> None:
+        # intercala src[ini:meio] e src[meio:fim] direto em dst[ini:fim]
+        i, j, k = ini, meio, ini
+        while i < meio and j < fim:
+            if med.cmp_le(src[i], src[j]):
+                dst[k] = src[i]; i += 1
             else:
-                res.append(right[j]); j += 1
-        if i < len(left): res.extend(left[i:])
-        if j < len(right): res.extend(right[j:])
-        return res
-
-    saida = merge_sort(arr[:])
+                dst[k] = src[j]; j += 1
+            k += 1
+        # sobras: atribuição por fatia (cópia em bloco, sem append)
+        if i < meio: dst[k:fim] = src[i:meio]
+        if j < fim: dst[k:fim] = src[j:fim]
+
+    # bottom-up: blocos de largura 1, 2, 4, ... intercalados alternando entre dois buffers
+    # (a lista decorada e o buffer auxiliar reaproveitado), sem recursão nem fatias por nível
+    n = len(decorados)
+    # se outra ordenação estiver usando o buffer compartilhado, esta usa um buffer próprio
+    compartilhado = _buffer_merge_lock.acquire(blocking=False)
+    try:
+        origem, destino = decorados, _buffer_auxiliar(n) if compartilhado else [None] * n
+        largura = 1
+        while largura < n:
+            for ini in range(0, n, 2 * largura):
+                meio = min(ini + largura, n)
+                fim = min(ini + 2 * largura, n)
+                merge(origem, destino, ini, meio, fim)
+            origem, destino = destino, origem
+            largura *= 2
+        # o buffer auxiliar pode ser maior que n: só as n primeiras posições valem
+        saida = [origem[i][1] for i in range(n)]
+    finally:
+        if compartilhado:
+            _buffer_merge_lock.release()
     dur_ms = (time.perf_counter() - inicio) * 1000
     return saida, {
         "algoritmo": "Merge Sort (estável)",
@@ -117,51 +223,307 @@ def merge_sort_estavel(arr: List[Paciente], key=chave_padrao):
         "estavel": True
     }
 
+# ============================
+# Powersort: runs naturais + galope (Timsort em Python)
+# ============================
+
+MIN_RUN = 32     # runs mais curtos são estendidos com inserção binária
+MIN_GALOPE = 7   # vitórias seguidas de um lado que ativam o modo galope
+
+def _potencia_no(s1: int, n1: int, n2: int, n: int) -> int:
+    """Potência da fronteira entre os runs [s1, s1+n1) e [s1+n1, s1+n1+n2) (regra de Munro–Wild)."""
+    # primeiro bit em que os pontos médios dos dois runs, normalizados por n, diferem
+    a = 2 * s1 + n1
+    b = a + n1 + n2
+    potencia = 0
+    while True:
+        potencia += 1
+        if a >= n:
+            a -= n
+            b -= n
+        elif b >= n:
+            return potencia
+        a <<= 1
+        b <<= 1
+
+def powersort_estavel(arr: List[dict], key=chave_padrao):
+    """
+    Merge sort natural no estilo do Timsort/listsort do CPython, em Python puro.
+
+    Aproveita os runs já existentes na fila (ascendentes, ou estritamente descendentes e
+    então invertidos), decide a ordem dos merges pela política powersort e, durante o
+    merge, entra em modo galope quando um dos lados vence MIN_GALOPE vezes seguidas.
+    Em filas quase ordenadas por chegada o custo fica próximo de O(N).
+    """
+    inicio = time.perf_counter()
+    med = Medidor()
+    a = [(key(p), p) for p in arr]
+    n = len(a)
+
+    def estender_run(ini: int) -> int:
+        fim = ini + 1
+        if fim == n:
+            return fim
+        if med.cmp_le(a[ini], a[fim]):
+            fim += 1
+            while fim < n and med.cmp_le(a[fim - 1], a[fim]):
+                fim += 1
+        else:
+            # só runs estritamente descendentes são invertidos, para não quebrar a estabilidade
+            fim += 1
+            while fim < n and not med.cmp_le(a[fim - 1], a[fim]):
+                fim += 1
+            a[ini:fim] = a[ini:fim][::-1]
+        return fim
+
+    def insercao_binaria(ini: int, fim: int, ordenado_ate: int) -> None:
+        for i in range(ordenado_ate, fim):
+            x = a[i]
+            lo, hi = ini, i
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if med.cmp_le(a[mid], x):
+                    lo = mid + 1
+                else:
+                    hi = mid
+            a[lo + 1:i + 1] = a[lo:i]
+            a[lo] = x
+
+    def galope(lst: list, ini: int, fim: int, pertence) -> int:
+        # primeiro índice de lst[ini:fim] para o qual pertence() é falso
+        # (busca exponencial seguida de busca binária)
+        lo, hi, passo = ini, ini, 1
+        while hi < fim and pertence(lst[hi]):
+            lo = hi + 1
+            hi = ini + passo
+            passo *= 2
+        hi = min(hi, fim)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if pertence(lst[mid]):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def merge(s1: int, n1: int, n2: int) -> None:
+        # intercala os runs adjacentes a[s1:s1+n1] e a[s1+n1:s1+n1+n2]; só o da esquerda é copiado
+        esq = a[s1:s1 + n1]
+        i, j, k = 0, s1 + n1, s1
+        fim_j = s1 + n1 + n2
+        vitorias_i = vitorias_j = 0
+        while i < n1 and j < fim_j:
+            if vitorias_i >= MIN_GALOPE or vitorias_j >= MIN_GALOPE:
+                y = a[j]
+                corte = galope(esq, i, n1, lambda x: med.cmp_le(x, y))
+                ganho_i = corte - i
+                a[k:k + ganho_i] = esq[i:corte]
+                k += ganho_i; i = corte
+                if i == n1:
+                    break
+                x = esq[i]
+                corte = galope(a, j, fim_j, lambda z: not med.cmp_le(x, z))
+                ganho_j = corte - j
+                a[k:k + ganho_j] = a[j:corte]
+                k += ganho_j; j = corte
+                if ganho_i < MIN_GALOPE and ganho_j < MIN_GALOPE:
+                    vitorias_i = vitorias_j = 0
+                continue
+            if med.cmp_le(esq[i], a[j]):
+                a[k] = esq[i]; i += 1
+                vitorias_i += 1; vitorias_j = 0
+            else:
+                a[k] = a[j]; j += 1
+                vitorias_j += 1; vitorias_i = 0
+            k += 1
+        # o que sobrar da direita já está no lugar
+        if i < n1:
+            a[k:k + n1 - i] = esq[i:]
+
+    def merge_topo(pilha: list) -> None:
+        s1, n1, potencia = pilha[-2]
+        _, n2, _ = pilha.pop()
+        merge(s1, n1, n2)
+        pilha[-1] = [s1, n1 + n2, potencia]
+
+    pilha: list = []  # runs pendentes: [início, tamanho, potência da fronteira à direita]
+    ini = 0
+    while ini < n:
+        fim = estender_run(ini)
+        if fim - ini < MIN_RUN and fim < n:
+            novo_fim = min(ini + MIN_RUN, n)
+            insercao_binaria(ini, novo_fim, fim)
+            fim = novo_fim
+        if pilha:
+            s1, n1, _ = pilha[-1]
+            potencia = _potencia_no(s1, n1, fim - ini, n)
+            while len(pilha) > 1 and pilha[-2][2] > potencia:
+                merge_topo(pilha)
+            pilha[-1][2] = potencia
+        pilha.append([ini, fim - ini, 0])
+        ini = fim
+    while len(pilha) > 1:
+        merge_topo(pilha)
+
+    saida = [p for _, p in a]
+    dur_ms = (time.perf_counter() - inicio) * 1000
+    return saida, {
+        "algoritmo": "Powersort (estável)",
+        "comparacoes": med.comparacoes,
+        "tempo_ms": round(dur_ms, 3),
+        "estavel": True
+    }
+
+# ============================
+# Timsort (sorted embutido, em C)
+# ============================
+
+def timsort_estavel(arr: List[dict], key=chave_padrao):
+    """
+    Ordena com o sorted() do Python (Timsort implementado em C, estável).
+
+    A chave é calculada uma única vez por paciente e as comparações acontecem em C,
+    sem passar pelo interpretador. Como a fila costuma chegar quase ordenada (chegada
+    crescente, poucas classes de triagem), a detecção de runs do Timsort deixa o custo
+    próximo de linear. As comparações não são contabilizadas.
+    """
+    inicio = time.perf_counter()
+    saida = sorted(arr, key=key)
+    dur_ms = (time.perf_counter() - inicio) * 1000
+    return saida, {
+        "algoritmo": "Timsort (C, estável)",
+        "comparacoes": None,
+        "tempo_ms": round(dur_ms, 3),
+        "estavel": True
+    }
+
+# ============================
+# numpy.lexsort (vetorizado)
+# ============================
+
+def chaves_em_colunas(arr: List[dict]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """As quatro chaves de chave_padrao (triagem, prioridade, chegada, -meses) como arrays numpy."""
+    col = pacientes_para_colunas(arr)
+    # idade em meses calculada em int32 para não estourar o int16 da coluna
+    neg_meses = -(col["idade"].astype(np.int32) * 12 + col["meses"])
+    return col["triagem"], col["prioridade_flag"], col["chegada"], neg_meses
+
+def lexsort_estavel(arr: List[dict]):
+    """
+    Ordena pelas mesmas quatro chaves inteiras de chave_padrao usando numpy.lexsort.
+
+    As chaves viram arrays numpy e a ordenação (estável) roda toda em C, sem nenhuma
+    comparação em Python; o resultado é uma permutação aplicada à lista original.
+    """
+    inicio = time.perf_counter()
+    triagem, prioridade_flag, chegada, neg_meses = chaves_em_colunas(arr)
+    # lexsort usa a última chave como primária
+    ordem = np.lexsort((neg_meses, chegada, prioridade_flag, triagem))
+    saida = [arr[i] for i in ordem]
+    dur_ms = (time.perf_counter() - inicio) * 1000
+    return saida, {
+        "algoritmo": "numpy.lexsort (estável)",
+        "comparacoes": None,
+        "tempo_ms": round(dur_ms, 3),
+        "estavel": True
+    }
+
+# ============================
+# Merge Sort compilado com Numba (opcional)
+# ============================
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+if njit is not None:
+    @njit(cache=True)
+    def _chave_le(triagem, prioridade, chegada, neg_meses, a, b):
+        if triagem[a] != triagem[b]:
+            return triagem[a] < triagem[b]
+        if prioridade[a] != prioridade[b]:
+            return prioridade[a] < prioridade[b]
+        if chegada[a] != chegada[b]:
+            return chegada[a] < chegada[b]
+        return neg_meses[a] <= neg_meses[b]
+
+    @njit(cache=True)
+    def _merge_sort_chaves(triagem, prioridade, chegada, neg_meses):
+        # mesmo merge sort bottom-up de merge_sort_estavel, mas sobre índices e compilado
+        n = triagem.shape[0]
+        ordem = np.arange(n)
+        buf = np.empty(n, dtype=ordem.dtype)
+        comparacoes = 0
+        largura = 1
+        while largura < n:
+            for ini in range(0, n, 2 * largura):
+                meio = min(ini + largura, n)
+                fim = min(ini + 2 * largura, n)
+                i, j, k = ini, meio, ini
+                while i < meio and j < fim:
+                    comparacoes += 1
+                    if _chave_le(triagem, prioridade, chegada, neg_meses, ordem[i], ordem[j]):
+                        buf[k] = ordem[i]; i += 1
+                    else:
+                        buf[k] = ordem[j]; j += 1
+                    k += 1
+                while i < meio:
+                    buf[k] = ordem[i]; i += 1; k += 1
+                while j < fim:
+                    buf[k] = ordem[j]; j += 1; k += 1
+            ordem, buf = buf, ordem
+            largura *= 2
+        return ordem, comparacoes
+
+    # compila no import (ou carrega do cache em disco) para o primeiro clique não pagar o JIT;
+    # as chaves vêm de chaves_em_colunas para a assinatura (dtypes) ser a mesma das chamadas reais
+    _merge_sort_chaves(*chaves_em_colunas([]))
+else:
+    _merge_sort_chaves = None
+
+def merge_sort_numba(arr: List[dict]):
+    """Merge Sort estável compilado com Numba sobre os arrays de chaves; devolve a permutação."""
+    inicio = time.perf_counter()
+    ordem, comparacoes = _merge_sort_chaves(*chaves_em_colunas(arr))
+    saida = [arr[i] for i in ordem]
+    dur_ms = (time.perf_counter() - inicio) * 1000
+    return saida, {
+        "algoritmo": "Merge Sort (Numba, estável)",
+        "comparacoes": int(comparacoes),
+        "tempo_ms": round(dur_ms, 3),
+        "estavel": True
+    }
+
+ALGORITMOS = {
+    "timsort": timsort_estavel,
+    "merge": merge_sort_estavel,
+    "lexsort": lexsort_estavel,
+    "powersort": powersort_estavel,
+}
+ALGORITMO_LABELS = {
+    "timsort": "Timsort (sorted, C)",
+    "merge": "Merge Sort (Python)",
+    "lexsort": "numpy.lexsort",
+    "powersort": "Powersort (runs naturais, Python)",
+}
+if _merge_sort_chaves is not None:
+    ALGORITMOS["numba"] = merge_sort_numba
+    ALGORITMO_LABELS["numba"] = "Merge Sort (Numba)"
+
 # ============================
 # Helpers de UI
 # ============================
 
-def pacientes_para_df(pacientes: List[Paciente]) -> pd.DataFrame:
-    df = pd.DataFrame([asdict(p) for p in pacientes])
-    if df.empty:
-        return pd.DataFrame(columns=["posição", "nome", "prioridade", "triagem_label", "chegada", "idade_label"])
-    df = df.assign(
-        triagem_label=df["triagem"].map(TRIAGEM_LABELS),
-        triagem_cor=df["triagem"].map(TRIAGEM_CORES),
-    )
-    # construir rótulo de prioridade legal (concatena grupos quando presentes)
-    def prioridade_label_row(row):
-        labels = []
-        if row.get("deficiencia"):
-            labels.append("Deficiência")
-        if row.get("gestante"):
-            labels.append("Gestante")
-        if row.get("lactante"):
-            labels.append("Lactante")
-        if row.get("crianca_colo"):
-            labels.append("Criança de colo")
-        if row.get("obesidade"):
-            labels.append("Obesidade")
-        # idoso é calculado a partir da idade (>=60)
-        if row.get("idade") is not None and int(row.get("idade")) >= 60:
-            labels.append("Idoso (60+)")
-        return ", ".join(labels)
-
-    df = df.assign(prioridade=df.apply(prioridade_label_row, axis=1))
-    # formatar idade como "X anos Y meses"
-    def idade_label_row(row):
-        anos = int(row.get("idade", 0))
-        meses = int(row.get("meses", 0) or 0)
-        if anos <= 0 and meses > 0:
-            return f"{meses} meses"
-        if meses <= 0:
-            return f"{anos} anos"
-        return f"{anos} anos {meses} meses"
-    df = df.assign(idade_label=df.apply(idade_label_row, axis=1))
-    # organizar colunas: manter triagem numérica (para regras de estilo), mostrar triagem_label e prioridade
-    df = df[["nome", "prioridade", "triagem", "triagem_label", "triagem_cor", "chegada", "idade_label"]]
-    df.insert(0, "posição", range(1, len(df) + 1))
-    return df
+# as regras de cor dependem só de TRIAGEM_CORES (não das linhas): ficam fixas na tabela,
+# sem recálculo nem reenvio a cada renderização
+_STYLE_TRIAGEM = [
+    {
+        "if": {"filter_query": f'{{triagem}} = {t}', "column_id": "triagem_label"},
+        "backgroundColor": cor, "color": "white", "fontWeight": "700",
+    }
+    for t, cor in TRIAGEM_CORES.items()
+]
 
 def tabela_formatada(id_table: str):
     return dash_table.DataTable(
@@ -177,6 +539,7 @@ def tabela_formatada(id_table: str):
         data=[],
         style_cell={"padding": "8px", "fontFamily": "Inter, system-ui, Arial", "fontSize": 14},
         style_header={"fontWeight": "700"},
+        style_data_conditional=_STYLE_TRIAGEM,
         style_table={"overflowX": "auto", "maxHeight": "60vh", "overflowY": "auto"},
         page_action="none",
         fill_width=True,
@@ -186,6 +549,9 @@ def tabela_formatada(id_table: str):
 def triagem_options():
     return [{"label": TRIAGEM_LABELS[t], "value": t} for t in sorted(TRIAGEM_LABELS.keys())]
 
+def algoritmo_options():
+    return [{"label": rotulo, "value": nome} for nome, rotulo in ALGORITMO_LABELS.items()]
+
 def card_style():
     return {
         "border": "1px solid #eee",
@@ -195,23 +561,64 @@ def card_style():
         "background": "white",
     }
 
-def colorir_triagem(df: pd.DataFrame):
-    if df.empty:
-        return []
-    return [
-        {
-            "if": {"filter_query": f'{{triagem}} = {t}', "column_id": "triagem_label"},
-            "backgroundColor": cor, "color": "white", "fontWeight": "700",
-        }
-        for t, cor in TRIAGEM_CORES.items()
-    ]
+# Rótulos e regras usados pelos callbacks clientside (assets/ordenaclinic.js)
+CONFIG_CLIENTE = {
+    "triagem_labels": TRIAGEM_LABELS,
+    "prioridade_labels": list(PRIORIDADE_LABELS.items()),
+    "opcoes_prioridade": OPCOES_PRIORIDADE,
+    "regras_prioridade": REGRAS_PRIORIDADE,
+    "idade_max_anos": IDADE_MAX_ANOS,
+    "meses_max": MESES_MAX,
+}
+
+# Fila de exemplo: os dados são fixos, então os dicts (e a fila já ordenada) são montados
+# uma vez no import e o callback só devolve as listas prontas
+_EXEMPLO = tuple(paciente_para_dict(p) for p in (
+    Paciente(1, "Ana", 1, 70, 1, 0, deficiencia=False, gestante=False, lactante=False, crianca_colo=False, obesidade=False),
+    Paciente(2, "Beto", 2, 30, 1, 0, deficiencia=False, gestante=False, lactante=False, crianca_colo=False, obesidade=True),
+    Paciente(3, "Caio", 3, 50, 0, 0, deficiencia=False, gestante=False, lactante=False, crianca_colo=False, obesidade=False),
+    Paciente(4, "Duda", 4, 65, 1, 0, deficiencia=False, gestante=False, lactante=False, crianca_colo=False, obesidade=False),
+    Paciente(5, "Eva", 5, 22, 2, 0, deficiencia=False, gestante=False, lactante=True, crianca_colo=False, obesidade=False),
+    Paciente(6, "Fábio", 6, 80, 1, 0, deficiencia=False, gestante=False, lactante=False, crianca_colo=False, obesidade=False),
+    Paciente(7, "Gabi", 7, 1, 2, 0, deficiencia=False, gestante=False, lactante=False, crianca_colo=True, obesidade=False),
+))
+_EXEMPLO_SEQ = max(p["chegada"] for p in _EXEMPLO)
+_EXEMPLO_ORDENADO = tuple(sorted(_EXEMPLO, key=chave_padrao))
 
 # ============================
 # App
 # ============================
 
-app = Dash(__name__, title="OrdenaClinic · Triagem", suppress_callback_exceptions=True)
+# Ordenação em segundo plano (opcional): com `pip install "dash[diskcache]"` o callback de
+# ordenar roda em outro processo e a interface continua respondendo durante filas grandes
+try:
+    import diskcache
+    from dash import DiskcacheManager
+    background_manager = DiskcacheManager(diskcache.Cache("./cache"))
+except ImportError:
+    background_manager = None
+
+# JSON mais rápido (opcional): com `pip install orjson` o store que chega em cada callback é
+# lido pelo orjson (em C). Na saída o Dash já serializa via plotly, que usa orjson se instalado.
+try:
+    import orjson
+    from flask.json.provider import DefaultJSONProvider
+
+    class OrjsonProvider(DefaultJSONProvider):
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+except ImportError:
+    OrjsonProvider = None
+
+app = Dash(
+    __name__,
+    title="OrdenaClinic · Triagem",
+    suppress_callback_exceptions=True,
+    background_callback_manager=background_manager,
+)
 server = app.server
+if OrjsonProvider is not None:
+    server.json = OrjsonProvider(server)
 
 app.layout = html.Div(
     style={
@@ -222,10 +629,13 @@ app.layout = html.Div(
     },
     children=[
         html.H1("🏥 OrdenaClinic", style={"marginBottom": "4px"}),
-        html.Div("Fila de triagem com ordenação estável (Merge Sort)", style={"color": "#555", "marginBottom": "16px"}),
+        html.Div("Fila de triagem mantida em ordem estável a cada cadastro, com comparação de algoritmos de ordenação", style={"color": "#555", "marginBottom": "16px"}),
 
         dcc.Store(id="store-pacientes", data={"lista": [], "seq_chegada": 0}),
         dcc.Store(id="store-ordenado", data={"lista": [], "metrics": {}}),
+        dcc.Store(id="store-config", data=CONFIG_CLIENTE),
+        # muda só quando um cadastro é aceito; dispara a limpeza do formulário
+        dcc.Store(id="store-cadastro", data=0),
 
         # ---- Formulário de cadastro ----
         html.Div(
@@ -244,8 +654,8 @@ app.layout = html.Div(
                 html.Div([
                     html.Label("Idade (anos / meses)"),
                     html.Div([
-                        dcc.Input(id="in-idade-anos", type="number", min=0, max=120, placeholder="Anos", style={"width": "48%", "marginRight": "4%"}),
-                        dcc.Input(id="in-idade-meses", type="number", min=0, max=11, placeholder="Meses", style={"width": "48%"}),
+                        dcc.Input(id="in-idade-anos", type="number", min=0, max=IDADE_MAX_ANOS, placeholder="Anos", style={"width": "48%", "marginRight": "4%"}),
+                        dcc.Input(id="in-idade-meses", type="number", min=0, max=MESES_MAX, placeholder="Meses", style={"width": "48%"}),
                     ], style={"display": "flex"}),
                 ]),
                 html.Div([
@@ -266,13 +676,7 @@ app.layout = html.Div(
             children=[
                 dcc.Checklist(
                     id="in-prioridades",
-                    options=[
-                        {"label": "Deficiência", "value": "deficiencia"},
-                        {"label": "Gestante", "value": "gestante"},
-                        {"label": "Lactante", "value": "lactante"},
-                        {"label": "Criança de colo", "value": "crianca_colo"},
-                        {"label": "Obesidade", "value": "obesidade"},
-                    ],
+                    options=OPCOES_PRIORIDADE,
                     value=[],
                     labelStyle={"marginRight": "12px"},
                 )
@@ -284,8 +688,14 @@ app.layout = html.Div(
             style={"display": "flex", "gap": "8px", "marginBottom": "8px", "flexWrap": "wrap"},
             children=[
                 html.Button("🧹 Limpar fila", id="btn-limpar", n_clicks=0, className="btn"),
-                html.Button("🧮 Ordenar (Merge Sort)", id="btn-ordenar", n_clicks=0, className="btn"),
-                html.Div(id="metrics-box", style={"marginLeft": "auto", "fontSize": 14, "color": "#333"}),
+                dcc.Dropdown(id="in-algoritmo", options=algoritmo_options(), value="timsort", clearable=False, style={"width": "220px"}),
+                html.Button("🧮 Ordenar", id="btn-ordenar", n_clicks=0, className="btn"),
+                # o spinner fica nas métricas: é a única saída visível de "Ordenar"
+                dcc.Loading(
+                    html.Div(id="metrics-box", style={"fontSize": 14, "color": "#333"}),
+                    type="circle",
+                    parent_style={"marginLeft": "auto"},
+                ),
             ],
         ),
 
@@ -305,7 +715,7 @@ app.layout = html.Div(
         ),
 
         html.Footer(
-            "Regra: triagem ASC → chegada ASC → idade DESC • Estabilidade garantida por Merge Sort",
+            "Regra: triagem ASC → prioridade legal → chegada ASC → idade DESC • A fila ordenada é mantida por inserção binária estável a cada cadastro; \"Ordenar\" mede o algoritmo escolhido",
             style={"marginTop": "16px", "color": "#666", "fontSize": 12},
         ),
 
@@ -325,9 +735,8 @@ app.layout = html.Div(
 
 @app.callback(
     Output("store-pacientes", "data"),
-    Output("in-nome", "value"),
-    Output("in-idade-anos", "value"),
-    Output("in-idade-meses", "value"),
+    Output("store-ordenado", "data", allow_duplicate=True),
+    Output("store-cadastro", "data"),
     Input("btn-add", "n_clicks"),
     State("in-nome", "value"),
     State("in-idade-anos", "value"),
@@ -335,31 +744,24 @@ app.layout = html.Div(
     State("in-triagem", "value"),
     State("in-prioridades", "value"),
     State("store-pacientes", "data"),
+    State("store-ordenado", "data"),
     prevent_initial_call=True,
 )
-def add_paciente(n, nome, idade_anos, idade_meses, triagem, prioridades, store):
+def add_paciente(n, nome, idade_anos, idade_meses, triagem, prioridades, store, store_ord):
     if not n or not nome or idade_anos is None:
         return no_update, no_update, no_update
-    lista = [Paciente(**p) for p in store["lista"]]
     seq = int(store.get("seq_chegada", 0)) + 1
-    flags = set(prioridades or [])
     idade_int = int(idade_anos)
     meses_int = int(idade_meses or 0)
-    # regra: não permitir gestante e lactante se idade >= 60 (idoso)
-    if idade_int >= 60 and "gestante" in flags:
-        flags.discard("gestante")
-    if idade_int >= 60 and "lactante" in flags:
-        flags.discard("lactante")
-    # regra: se for criança de colo, não pode ser gestante nem lactante
-    if "crianca_colo" in flags:
-        flags.discard("gestante")
-        flags.discard("lactante")
-    # regra: criança de colo permitida até 3 anos (<= 36 meses)
-    if (idade_int * 12 + meses_int) > 36 and "crianca_colo" in flags:
-        flags.discard("crianca_colo")
+    # a validação do formulário roda só no navegador: fora da faixa, o cadastro é ignorado
+    if not (0 <= idade_int <= IDADE_MAX_ANOS and 0 <= meses_int <= MESES_MAX):
+        return no_update, no_update, no_update
+    # mesmas regras que desabilitam as opções do checklist no navegador
+    flags = aplicar_regras_prioridade(idade_int, meses_int, frozenset(prioridades or ()))
 
+    # o id reaproveita o contador de chegada: já é monotônico e único na fila (como no exemplo)
     novo = Paciente(
-        id=int(datetime.utcnow().timestamp() * 1000000) % 10**9,
+        id=seq,
         nome=nome.strip(),
         chegada=seq,
         idade=idade_int,
@@ -371,28 +773,31 @@ def add_paciente(n, nome, idade_anos, idade_meses, triagem, prioridades, store):
         crianca_colo="crianca_colo" in flags,
         obesidade="obesidade" in flags,
     )
-    lista.append(novo)
-    return {"lista": [asdict(p) for p in lista], "seq_chegada": seq}, "", None, None
+    novo_dict = paciente_para_dict(novo)
+    # só o delta volta ao navegador (Patch): um append/insert e o novo contador, em vez de
+    # reenviar as duas filas inteiras. A resposta fica O(1); a requisição ainda leva os dois
+    # stores como State (o contador e a fila ordenada, usada na busca binária)
+    fila = Patch()
+    fila["lista"].append(novo_dict)
+    fila["seq_chegada"] = seq
+    # a fila ordenada é mantida incrementalmente: busca binária pela chave do novo paciente
+    # (O(log N) comparações), em vez de reordenar tudo a cada cadastro
+    pos = bisect.bisect_right(store_ord["lista"], chave_padrao(novo_dict), key=chave_padrao)
+    fila_ordenada = Patch()
+    fila_ordenada["lista"].insert(pos, novo_dict)
+    # n_clicks cresce a cada clique: valor novo em store-cadastro a cada paciente aceito
+    return fila, fila_ordenada, n
 
 @app.callback(
     Output("store-pacientes", "data", allow_duplicate=True),
+    Output("store-ordenado", "data", allow_duplicate=True),
     Input("btn-exemplo", "n_clicks"),
     prevent_initial_call=True,
 )
 def exemplo(n):
     if not n:
-        return no_update
-    exemplo_dados = [
-        Paciente(1, "Ana", 1, 70, 1, 0, deficiencia=False, gestante=False, lactante=False, crianca_colo=False, obesidade=False),
-        Paciente(2, "Beto", 2, 30, 1, 0, deficiencia=False, gestante=False, lactante=False, crianca_colo=False, obesidade=True),
-        Paciente(3, "Caio", 3, 50, 0, 0, deficiencia=False, gestante=False, lactante=False, crianca_colo=False, obesidade=False),
-        Paciente(4, "Duda", 4, 65, 1, 0, deficiencia=False, gestante=False, lactante=False, crianca_colo=False, obesidade=False),
-        Paciente(5, "Eva", 5, 22, 2, 0, deficiencia=False, gestante=False, lactante=True, crianca_colo=False, obesidade=False),
-        Paciente(6, "Fábio", 6, 80, 1, 0, deficiencia=False, gestante=False, lactante=False, crianca_colo=False, obesidade=False),
-        Paciente(7, "Gabi", 7, 1, 2, 0, deficiencia=False, gestante=False, lactante=False, crianca_colo=True, obesidade=False),
-    ]
-    seq = max(p.chegada for p in exemplo_dados)
-    return {"lista": [asdict(p) for p in exemplo_dados], "seq_chegada": seq}
+        return no_update, no_update
+    return {"lista": list(_EXEMPLO), "seq_chegada": _EXEMPLO_SEQ}, {"lista": list(_EXEMPLO_ORDENADO), "metrics": {}}
 
 @app.callback(
     Output("store-pacientes", "data", allow_duplicate=True),
@@ -410,123 +815,76 @@ def limpar(n):
     Output("metrics-box", "children"),
     Input("btn-ordenar", "n_clicks"),
     State("store-pacientes", "data"),
+    State("in-algoritmo", "value"),
+    background=background_manager is not None,
+    running=[(Output("btn-ordenar", "disabled"), True, False)],
     prevent_initial_call=True,
 )
-def ordenar(n, store):
-    pacientes = [Paciente(**p) for p in store["lista"]]
+def ordenar(n, store, algoritmo):
+    # store-ordenado já é mantido ordenado a cada cadastro; aqui só se mede o algoritmo e
+    # gravam-se as métricas. A lista não é sobrescrita: a ordenação pode rodar em segundo
+    # plano sobre uma cópia antiga da fila, e pacientes cadastrados nesse meio-tempo sumiriam
+    resultado = Patch()
+    pacientes = store["lista"]
     if not pacientes:
-        return {"lista": [], "metrics": {}}, html.Span("Fila vazia.", style={"color": "#999"})
-    ordenado, metrics = merge_sort_estavel(pacientes)
-    metrics_txt = f"Algoritmo: {metrics['algoritmo']} • Comparações: {metrics['comparacoes']} • Tempo: {metrics['tempo_ms']} ms • Estável: {metrics['estavel']}"
-    return {"lista": [asdict(p) for p in ordenado], "metrics": metrics}, metrics_txt
-
-@app.callback(
+        resultado["metrics"] = {}
+        return resultado, html.Span("Fila vazia.", style={"color": "#999"})
+    ordenar_fn = ALGORITMOS.get(algoritmo, timsort_estavel)
+    _, metrics = ordenar_fn(pacientes)
+    comparacoes = metrics["comparacoes"] if metrics["comparacoes"] is not None else "—"
+    metrics_txt = f"Algoritmo: {metrics['algoritmo']} • Comparações: {comparacoes} • Tempo: {metrics['tempo_ms']} ms • Estável: {metrics['estavel']}"
+    resultado["metrics"] = metrics
+    return resultado, metrics_txt
+
+# As duas tabelas são montadas no navegador pela mesma função JS: o store já está lá em JSON,
+# então não há ida ao servidor nem trabalho em Python a cada alteração da fila
+app.clientside_callback(
+    ClientsideFunction(namespace="ordenaclinic", function_name="render"),
     Output("tbl-antes", "data"),
-    Output("tbl-antes", "style_data_conditional"),
     Input("store-pacientes", "data"),
+    State("store-config", "data"),
 )
-def render_antes(store):
-    pacientes = [Paciente(**p) for p in store["lista"]]
-    df = pacientes_para_df(pacientes)
-    return df.to_dict("records"), colorir_triagem(df)
 
-@app.callback(
+app.clientside_callback(
+    ClientsideFunction(namespace="ordenaclinic", function_name="render"),
     Output("tbl-depois", "data"),
-    Output("tbl-depois", "style_data_conditional"),
     Input("store-ordenado", "data"),
+    State("store-config", "data"),
 )
-def render_depois(store_ord):
-    pacientes = [Paciente(**p) for p in store_ord["lista"]]
-    df = pacientes_para_df(pacientes)
-    return df.to_dict("records"), colorir_triagem(df)
 
 
-@app.callback(
+# Validação do formulário e opções de prioridade mudam a cada tecla: rodam no navegador,
+# sem requisição ao servidor (assets/ordenaclinic.js)
+app.clientside_callback(
+    ClientsideFunction(namespace="ordenaclinic", function_name="ajustarPrioridades"),
     Output("in-prioridades", "options"),
     Output("in-prioridades", "value"),
     Input("in-idade-anos", "value"),
     Input("in-idade-meses", "value"),
     Input("in-prioridades", "value"),
+    State("store-config", "data"),
 )
-def ajustar_prioridades_por_idade(idade_anos, idade_meses, current_vals):
-    """Desabilita e desmarca opções inválidas conforme idade em anos/meses e seleção de prioridades.
-
-    Regras adicionais:
-    - Se 'crianca_colo' estiver marcada, então 'gestante' e 'lactante' são inválidas e serão removidas.
-    """
-    base = [
-        {"label": "Deficiência", "value": "deficiencia"},
-        {"label": "Gestante", "value": "gestante"},
-        {"label": "Lactante", "value": "lactante"},
-        {"label": "Criança de colo", "value": "crianca_colo"},
-        {"label": "Obesidade", "value": "obesidade"},
-    ]
-    try:
-        anos = int(idade_anos) if idade_anos is not None else None
-        meses = int(idade_meses) if idade_meses is not None else 0
-    except Exception:
-        return base, current_vals or []
-
-    if anos is None:
-        return base, current_vals or []
-
-    total_months = anos * 12 + meses
-
-    # lógica para gestante/lactante/creche
-    opts = []
-    for o in base:
-        val = o["value"]
-        disabled = False
-        # desabilitar gestante/lactante para idosos (>=60 anos)
-        if anos >= 60 and val in ("gestante", "lactante"):
-            disabled = True
-        # desabilitar crianca_colo se total_months > 36 (permitimos até 36 meses)
-        if val == "crianca_colo" and total_months > 36:
-            disabled = True
-        # se crianca_colo estiver marcada, gestante/lactante são inválidas
-        if "crianca_colo" in (current_vals or []) and val in ("gestante", "lactante"):
-            disabled = True
-        opts.append({**o, "disabled": disabled} if disabled else o)
-    vals = list(current_vals or [])
-    # remover gestante/lactante se idosos ou se crianca_colo estiver selecionada
-    if anos >= 60 or "crianca_colo" in (current_vals or []):
-        vals = [v for v in vals if v not in ("gestante", "lactante")]
-    # remover crianca_colo se > 36 meses
-    if total_months > 36:
-        vals = [v for v in vals if v != "crianca_colo"]
-    return opts, vals
 
+# Limpa o formulário depois de um cadastro aceito (e não ao carregar o exemplo ou limpar a
+# fila); o callback de cadastro devolve só os stores
+app.clientside_callback(
+    ClientsideFunction(namespace="ordenaclinic", function_name="limparForm"),
+    Output("in-nome", "value"),
+    Output("in-idade-anos", "value"),
+    Output("in-idade-meses", "value"),
+    Input("store-cadastro", "data"),
+    prevent_initial_call=True,
+)
 
-@app.callback(
+app.clientside_callback(
+    ClientsideFunction(namespace="ordenaclinic", function_name="validarForm"),
     Output("btn-add", "disabled"),
     Output("add-msg", "children"),
     Input("in-nome", "value"),
     Input("in-idade-anos", "value"),
     Input("in-idade-meses", "value"),
+    State("store-config", "data"),
 )
-def validar_form(nome, anos, meses):
-    # Nome obrigatório
-    if not nome or not str(nome).strip():
-        return True, "Informe o nome do paciente"
-    # anos must be integer >= 0
-    try:
-        anos_int = int(anos)
-        if anos_int < 0:
-            return True, "Idade inválida"
-    except Exception:
-        return True, "Informe a idade (anos)"
-    # meses must be between 0 and 11
-    if meses is None:
-        meses_int = 0
-    else:
-        try:
-            meses_int = int(meses)
-        except Exception:
-            return True, "Meses inválidos"
-    if meses_int < 0 or meses_int > 11:
-        return True, "Meses deve estar entre 0 e 11"
-    # all good
-    return False, ""
 
 # ============================
 # Main